@@ -5,8 +5,15 @@ from app.models.response import ChatResponse
 from app.services import rag_service
 from app.services.rag_service import CATEGORY_TO_COLLECTION
 from app.core.memory import memory
-from langchain_core.messages import HumanMessage
+from app.core.admission import (
+    AdmissionRejected,
+    coalescer,
+    get_limiter,
+    normalize_question,
+)
+from langchain_core.messages import AIMessage, HumanMessage
 from datetime import datetime
+import asyncio
 
 router = APIRouter(prefix="/chat", tags=["Chat"])
 
@@ -25,7 +32,8 @@ async def chat(thread_id: str, request: ChatRequest):
         A ChatResponse object, containing the response from the AI and the sources used to generate the response.
 
     Raises:
-        HTTPException: If the category is invalid or if there is an error during the chat.
+        HTTPException: If the category is invalid, if the category is overloaded
+            (429/503 with a Retry-After header), or if there is an error during the chat.
     """
     if request.category not in CATEGORY_TO_COLLECTION:
         raise HTTPException(
@@ -41,56 +49,102 @@ async def chat(thread_id: str, request: ChatRequest):
         config = {"configurable": {"thread_id": thread_id}}
 
         # Create user message with timestamp
-        input_message = {
-            "messages": [
-                HumanMessage(
-                    content=request.question,
-                    additional_kwargs={"timestamp": datetime.utcnow().isoformat()},
+        human_message = HumanMessage(
+            content=request.question,
+            additional_kwargs={"timestamp": datetime.utcnow().isoformat()},
+        )
+        input_message = {"messages": [human_message]}
+
+        limiter = get_limiter(request.category)
+
+        # Questions on a thread with prior context depend on that context,
+        # so only fresh threads can share an in-flight answer.
+        if _has_history(config):
+            answer, sources = await limiter.run(
+                _run_graph, rag_graph, config, input_message
+            )
+        else:
+            key = (request.category, normalize_question(request.question))
+            (answer, sources), shared = await coalescer.run(
+                key,
+                lambda: limiter.run(_run_graph, rag_graph, config, input_message),
+                owner=thread_id,
+            )
+
+            if shared:
+                # Record the shared exchange in this thread's history; a repeat
+                # post on the leader's own thread is already recorded there
+                await asyncio.to_thread(
+                    rag_graph.update_state,
+                    config,
+                    {
+                        "messages": [
+                            human_message,
+                            AIMessage(
+                                content=answer,
+                                additional_kwargs={
+                                    "timestamp": datetime.utcnow().isoformat()
+                                },
+                            ),
+                        ]
+                    },
+                    as_node="generate",
                 )
-            ]
-        }
-
-        # Run the graph and collect all steps
-        messages = []
-        sources = []
-
-        for step in rag_graph.stream(
-            input_message, config=config, stream_mode="values"
-        ):
-            messages = step["messages"]
-
-        # Get the final AI response
-        final_response = messages[-1]
-
-        # Extract sources from tool messages
-        for message in messages:
-            # Only process tool messages that contain artifacts (retrieved documents)
-            if getattr(message, "type", None) == "tool" and hasattr(message, "artifact"):
-                # message.artifact can be None or a list of retrieved documents
-                artifacts = message.artifact or []
-                for doc in artifacts:
-                    # Support both `Document` objects and their dict representations
-                    if isinstance(doc, dict):
-                        metadata = doc.get("metadata", {})
-                    else:
-                        metadata = getattr(doc, "metadata", {}) or {}
-
-                    source_info = {
-                        "filename": metadata.get("filename", "Unknown"),
-                        "document_id": metadata.get("document_id", ""),
-                        "file_path": metadata.get("file_path", ""),
-                    }
-                    if source_info not in sources:
-                        sources.append(source_info)
 
-        return ChatResponse(
-            answer=final_response.content, thread_id=thread_id, sources=sources
-        )
+        return ChatResponse(answer=answer, thread_id=thread_id, sources=sources)
 
+    except AdmissionRejected as e:
+        raise HTTPException(
+            status_code=e.status_code,
+            detail=e.detail,
+            headers={"Retry-After": str(e.retry_after)},
+        )
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error during chat: {str(e)}")
 
 
+def _has_history(config: dict) -> bool:
+    """Check whether a thread already has conversation messages."""
+    checkpoint = memory.get(config)
+    return bool(checkpoint and checkpoint.get("channel_values", {}).get("messages"))
+
+
+def _run_graph(rag_graph, config: dict, input_message: dict) -> tuple[str, list]:
+    """Run the RAG graph for a thread and collect the answer and its sources."""
+    # Run the graph and collect all steps
+    messages = []
+    sources = []
+
+    for step in rag_graph.stream(input_message, config=config, stream_mode="values"):
+        messages = step["messages"]
+
+    # Get the final AI response
+    final_response = messages[-1]
+
+    # Extract sources from tool messages
+    for message in messages:
+        # Only process tool messages that contain artifacts (retrieved documents)
+        if getattr(message, "type", None) == "tool" and hasattr(message, "artifact"):
+            # message.artifact can be None or a list of retrieved documents
+            artifacts = message.artifact or []
+            for doc in artifacts:
+                # Support both `Document` objects and their dict representations
+                if isinstance(doc, dict):
+                    metadata = doc.get("metadata", {})
+                else:
+                    metadata = getattr(doc, "metadata", {}) or {}
+
+                source_info = {
+                    "filename": metadata.get("filename", "Unknown"),
+                    "document_id": metadata.get("document_id", ""),
+                    "file_path": metadata.get("file_path", ""),
+                }
+                if source_info not in sources:
+                    sources.append(source_info)
+
+    return final_response.content, sources
+
+
 @router.get("/history/{thread_id}")
 async def get_chat_history(thread_id: str = FastAPIPath(..., description="Thread ID")):
     """Get conversation history for a thread"""
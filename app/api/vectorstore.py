@@ -5,6 +5,9 @@ from pydantic import BaseModel
 from typing import Optional
 from qdrant_client.models import PointIdsList
 
+from app.models.response import SnapshotResponse
+from app.services import snapshot_service
+
 
 class PointPayload(BaseModel):
     page_content: Optional[str]
@@ -136,3 +139,76 @@ async def update_knowledge(
             status_code=500,
             detail=f"An error occurred while updating the document: {str(e)}",
         )
+
+
+@router.post(
+    "/bejo-knowledge-level-{level}/export", response_model=SnapshotResponse
+)
+def export_knowledge(
+    level: str,
+    quantize: bool = Query(False, description="Store vectors as int8"),
+):
+    """
+    Export a knowledge level to a snapshot bundle.
+
+    Vectors are written as a memory-mappable array and payloads as columns,
+    so the bundle can be imported elsewhere without re-embedding.
+    """
+    try:
+        collection_name = f"bejo_knowledge_level_{level}"
+        try:
+            qdrant_client.get_collection(collection_name)
+        except UnexpectedResponse as e:
+            if e.status_code == 404:
+                raise HTTPException(
+                    status_code=404,
+                    detail=f"Collection {collection_name} does not exist.",
+                )
+            raise
+
+        return snapshot_service.export_collection(collection_name, quantize=quantize)
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"An error occurred while exporting the vector store: {str(e)}",
+        )
+
+
+@router.post(
+    "/bejo-knowledge-level-{level}/import", response_model=SnapshotResponse
+)
+def import_knowledge(
+    level: str,
+    snapshot: Optional[str] = Query(
+        None, description="Snapshot name, defaults to the collection name"
+    ),
+):
+    """Bulk-upsert a snapshot bundle into a knowledge level without re-embedding."""
+    try:
+        collection_name = f"bejo_knowledge_level_{level}"
+        try:
+            qdrant_client.get_collection(collection_name)
+        except UnexpectedResponse as e:
+            if e.status_code == 404:
+                raise HTTPException(
+                    status_code=404,
+                    detail=f"Collection {collection_name} does not exist.",
+                )
+            raise
+
+        return snapshot_service.import_collection(collection_name, snapshot)
+
+    except HTTPException:
+        raise
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"An error occurred while importing the vector store: {str(e)}",
+        )
@@ -0,0 +1,134 @@
+import asyncio
+import functools
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Awaitable, Callable, Hashable
+
+CHAT_MAX_CONCURRENT = int(os.getenv("CHAT_MAX_CONCURRENT", 4))
+CHAT_MAX_QUEUE = int(os.getenv("CHAT_MAX_QUEUE", 16))
+CHAT_QUEUE_TIMEOUT = float(os.getenv("CHAT_QUEUE_TIMEOUT", 30))
+CHAT_RETRY_AFTER = int(os.getenv("CHAT_RETRY_AFTER", 5))
+
+
+class AdmissionRejected(Exception):
+    """Raised when a request cannot be admitted to the LLM."""
+
+    def __init__(self, status_code: int, detail: str, retry_after: int):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+        self.retry_after = retry_after
+
+
+class CategoryLimiter:
+    """Bound concurrent LLM work for a category behind a bounded wait queue."""
+
+    def __init__(
+        self,
+        max_concurrent: int = CHAT_MAX_CONCURRENT,
+        max_queue: int = CHAT_MAX_QUEUE,
+        queue_timeout: float = CHAT_QUEUE_TIMEOUT,
+        retry_after: int = CHAT_RETRY_AFTER,
+    ):
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.retry_after = retry_after
+        self._semaphore = asyncio.Semaphore(max_concurrent)
+        self._waiting = 0
+        # Dedicated workers, so admitted requests never queue again behind
+        # other categories in the shared default executor
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_concurrent, thread_name_prefix="chat-limiter"
+        )
+
+    async def _acquire(self):
+        if not self._semaphore.locked():
+            await self._semaphore.acquire()
+            return
+
+        if self._waiting >= self.max_queue:
+            raise AdmissionRejected(
+                429, "Too many pending requests, please retry later", self.retry_after
+            )
+
+        self._waiting += 1
+        try:
+            await asyncio.wait_for(self._semaphore.acquire(), self.queue_timeout)
+        except asyncio.TimeoutError:
+            raise AdmissionRejected(
+                503, "Service is busy, please retry later", self.retry_after
+            )
+        finally:
+            self._waiting -= 1
+
+    async def run(self, func: Callable[..., Any], *args) -> Any:
+        """Run a blocking function in a worker thread once a slot is free.
+
+        The slot is held until the worker finishes, even if the caller goes
+        away, so the number of in-flight LLM calls never exceeds the limit.
+        """
+        await self._acquire()
+        try:
+            future = asyncio.get_running_loop().run_in_executor(
+                self._executor, functools.partial(func, *args)
+            )
+        except BaseException:
+            self._semaphore.release()
+            raise
+        future.add_done_callback(lambda _: self._semaphore.release())
+        return await asyncio.shield(future)
+
+
+class RequestCoalescer:
+    """Share one in-flight computation between concurrent identical requests."""
+
+    def __init__(self):
+        self._inflight: dict[Hashable, tuple[asyncio.Future, Hashable]] = {}
+
+    async def run(
+        self,
+        key: Hashable,
+        factory: Callable[[], Awaitable[Any]],
+        owner: Hashable = None,
+    ) -> tuple[Any, bool]:
+        """Await the result for `key`, starting it only if none is in flight.
+
+        Args:
+            key: Identifies requests that can share one computation.
+            factory: Starts the computation when no request for `key` is in flight.
+            owner: Who the result is recorded for, e.g. a thread ID. A request
+                joining a computation started by the same owner is not shared.
+
+        Returns:
+            A tuple of the result and whether it was shared from another owner.
+        """
+        inflight = self._inflight.get(key)
+
+        if inflight is None:
+            task = asyncio.ensure_future(factory())
+            self._inflight[key] = (task, owner)
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+            shared = False
+        else:
+            task, leader = inflight
+            shared = leader is None or leader != owner
+
+        return await asyncio.shield(task), shared
+
+
+def normalize_question(question: str) -> str:
+    """Normalize a question so trivially different spellings coalesce."""
+    return " ".join(question.casefold().split()).rstrip(" ?!.")
+
+
+_limiters: dict[str, CategoryLimiter] = {}
+
+
+def get_limiter(category: str) -> CategoryLimiter:
+    """Get or create the limiter for a category."""
+    if category not in _limiters:
+        _limiters[category] = CategoryLimiter()
+    return _limiters[category]
+
+
+coalescer = RequestCoalescer()
@@ -0,0 +1,192 @@
+from langchain_core.documents import Document
+
+import math
+import os
+
+CONTEXT_TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", 2000))
+
+# Rough characters-per-token ratio, avoids a tokenizer round-trip per request
+CHARS_PER_TOKEN = 4
+
+# Longest overlap looked for between adjacent chunks
+MAX_OVERLAP_CHARS = 500
+
+
+def estimate_tokens(text: str) -> int:
+    """Estimate the number of prompt tokens in a piece of text."""
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def _normalize(text: str) -> str:
+    return " ".join(text.split())
+
+
+def _strip_overlap(
+    previous: str, current: str, limit: int = MAX_OVERLAP_CHARS
+) -> str:
+    """Remove the longest prefix of `current` that is a suffix of `previous`."""
+    for size in range(min(len(previous), len(current), limit), 0, -1):
+        if previous.endswith(current[:size]):
+            return current[size:].lstrip()
+    return current
+
+
+def _chunk_indices(doc: Document) -> list[int]:
+    """Chunk indices a document covers, including blocks merged earlier."""
+    indices = doc.metadata.get("chunk_indices")
+    if indices is None:
+        indices = [doc.metadata.get("chunk_index")]
+    return [index for index in indices if index is not None]
+
+
+def _merge_group(docs: list[tuple[Document, float]]) -> list[tuple[Document, float]]:
+    """Merge adjacent or overlapping chunks of one document, dropping overlap."""
+    indexed = sorted(
+        (item for item in docs if _chunk_indices(item[0])),
+        key=lambda item: min(_chunk_indices(item[0])),
+    )
+    blocks = [[item] for item in docs if not _chunk_indices(item[0])]
+
+    # Blocks whose chunk spans touch or overlap belong to the same run
+    run: list[tuple[Document, float]] = []
+    run_end = -1
+    for item in indexed:
+        indices = _chunk_indices(item[0])
+        if run and min(indices) > run_end + 1:
+            blocks.append(run)
+            run = []
+        run_end = max(run_end, max(indices)) if run else max(indices)
+        run.append(item)
+    if run:
+        blocks.append(run)
+
+    merged = []
+    for block in blocks:
+        text = block[0][0].page_content
+        covered = set(_chunk_indices(block[0][0]))
+        for doc, _ in block[1:]:
+            indices = set(_chunk_indices(doc))
+            if indices <= covered:
+                continue
+            # Shared chunks are whole chunks, so look past the usual cap
+            limit = len(doc.page_content) if indices & covered else MAX_OVERLAP_CHARS
+            addition = _strip_overlap(text, doc.page_content, limit)
+            text = f"{text}\n\n{addition}".rstrip()
+            covered |= indices
+        score = max(score for _, score in block)
+        metadata = dict(block[0][0].metadata)
+        metadata["chunk_indices"] = sorted(
+            {index for doc, _ in block for index in _chunk_indices(doc)}
+        )
+        metadata["score"] = score
+        merged.append((Document(page_content=text, metadata=metadata), score))
+    return merged
+
+
+def _header(doc: Document) -> str:
+    return (
+        f"Source: {doc.metadata.get('filename', 'Unknown')} "
+        f"(Document ID: {doc.metadata.get('document_id', 'Unknown')})"
+    )
+
+
+def serialize(docs: list[Document]) -> str:
+    """Serialize documents with one source header per document."""
+    sections = []
+    for doc in docs:
+        header = _header(doc)
+        if sections and sections[-1][0] == header:
+            sections[-1][1].append(doc.page_content)
+        else:
+            sections.append((header, [doc.page_content]))
+    return "\n\n".join(
+        header + "\n" + "\n\n".join(contents) for header, contents in sections
+    )
+
+
+def pack_documents(
+    docs_with_scores: list[tuple[Document, float]],
+    token_budget: int = CONTEXT_TOKEN_BUDGET,
+) -> tuple[list[Document], dict[str, int]]:
+    """
+    Pack retrieved chunks into a compact context that fits a token budget.
+
+    Duplicate and contained chunks are dropped, adjacent chunks of the same
+    document are merged, and blocks are kept in score order (highest first)
+    until the budget is spent, truncating the last block that fits partially.
+    Source headers count towards the budget.
+
+    Args:
+        docs_with_scores: Retrieved documents and their similarity scores.
+        token_budget: The maximum number of context tokens to keep.
+
+    Returns:
+        A tuple of the packed documents, grouped by source, and a dict with
+        `tokens_before`, `tokens_after`, `chunks_before` and `chunks_after`.
+    """
+    tokens_before = estimate_tokens(
+        "\n\n".join(
+            f"Source: {doc.metadata.get('filename', 'Unknown')}\n"
+            f"Document ID: {doc.metadata.get('document_id', 'Unknown')}\n"
+            f"Content: {doc.page_content}"
+            for doc, _ in docs_with_scores
+        )
+    )
+
+    # Drop exact duplicates and chunks contained in a higher scoring chunk
+    unique: list[tuple[Document, float]] = []
+    for doc, score in sorted(docs_with_scores, key=lambda item: -item[1]):
+        text = _normalize(doc.page_content)
+        if not text or any(text in _normalize(kept.page_content) for kept, _ in unique):
+            continue
+        unique.append((doc, score))
+
+    groups: dict[str, list[tuple[Document, float]]] = {}
+    for doc, score in unique:
+        groups.setdefault(doc.metadata.get("document_id", ""), []).append((doc, score))
+
+    blocks = [block for group in groups.values() for block in _merge_group(group)]
+    blocks.sort(key=lambda item: -item[1])
+
+    # Budget in characters of the serialized output, charging each source
+    # header once and the separators `serialize` puts between sections/blocks
+    packed: list[Document] = []
+    headers: set[str] = set()
+    remaining = token_budget * CHARS_PER_TOKEN
+    for doc, score in blocks:
+        header = _header(doc)
+        if header in headers:
+            overhead = 2
+        else:
+            overhead = len(header) + 1 + (2 if headers else 0)
+        room = remaining - overhead
+        if len(doc.page_content) > room:
+            text = doc.page_content[: max(room, 0)].rstrip()
+            if text:
+                packed.append(Document(page_content=text, metadata=doc.metadata))
+            break
+        packed.append(doc)
+        headers.add(header)
+        remaining = room - len(doc.page_content)
+
+    # Keep blocks of the same document next to each other, best document first
+    rank: dict[str, int] = {}
+    for doc in packed:
+        rank.setdefault(doc.metadata.get("document_id", ""), len(rank))
+    packed.sort(key=lambda doc: rank[doc.metadata.get("document_id", "")])
+
+    stats = {
+        "tokens_before": tokens_before,
+        "tokens_after": estimate_tokens(serialize(packed)),
+        "chunks_before": len(docs_with_scores),
+        "chunks_after": len(packed),
+    }
+    return packed, stats
+
+
+def log_packing(stats: dict[str, int]):
+    """Print the token reduction achieved by packing."""
+    print(
+        f"Packed {stats['chunks_before']} chunks into {stats['chunks_after']}: "
+        f"{stats['tokens_before']} -> {stats['tokens_after']} tokens"
+    )
@@ -13,3 +13,12 @@ class UploadResponse(BaseModel):
     filename: str
     document_id: str
     chunks_created: int
+
+
+class SnapshotResponse(BaseModel):
+    collection: str
+    path: str
+    vector_dtype: str
+    points: int
+    seconds: float
+    points_per_second: float
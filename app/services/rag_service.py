@@ -4,6 +4,7 @@ from langchain_docling import DoclingLoader
 from langchain_docling.loader import ExportType
 from langchain_qdrant import QdrantVectorStore
 from langchain_core.tools import tool
+from langchain_core.documents import Document
 from langchain_core.messages import SystemMessage
 
 from langgraph.graph import MessagesState, StateGraph, END
@@ -14,7 +15,9 @@ from app.core.vectorstore import qdrant_client
 from app.core.splitter import splitter
 from app.core.llm import llm
 from app.core.memory import memory
+from app.core.packer import log_packing, pack_documents, serialize
 
+import os
 import uuid
 from datetime import datetime
 
@@ -25,6 +28,8 @@ COLLECTION_NAMES = [
     "bejo_knowledge_level_4",
 ]
 
+RETRIEVAL_K = int(os.getenv("RETRIEVAL_K", 3))
+
 CATEGORY_TO_COLLECTION = {
     "1": "bejo_knowledge_level_1",
     "2": "bejo_knowledge_level_2",
@@ -86,8 +91,9 @@ class RAGService:
         combined_text = "\n\n".join([doc.page_content for doc in documents])
         chunk_docs = splitter().split_text(combined_text)
 
-        for chunk in chunk_docs:
+        for index, chunk in enumerate(chunk_docs):
             chunk.metadata.update(base_metadata)
+            chunk.metadata["chunk_index"] = index
 
         collection_name = CATEGORY_TO_COLLECTION.get(category)
         if not collection_name:
@@ -110,19 +116,15 @@ class RAGService:
         def retrieve(query: str):
             """Retrieve information related to a query from the knowledge base."""
             try:
-                retrieved_docs = vector_store.similarity_search(query, k=3)
+                retrieved_docs = vector_store.similarity_search_with_score(
+                    query, k=RETRIEVAL_K
+                )
                 if not retrieved_docs:
                     return "No relevant information found in the knowledge base.", []
 
-                serialized = "\n\n".join(
-                    [
-                        f"Source: {doc.metadata.get('filename', 'Unknown')}\n"
-                        f"Document ID: {doc.metadata.get('document_id', 'Unknown')}\n"
-                        f"Content: {doc.page_content}"
-                        for doc in retrieved_docs
-                    ]
-                )
-                return serialized, retrieved_docs
+                packed_docs, stats = pack_documents(retrieved_docs)
+                log_packing(stats)
+                return serialize(packed_docs), packed_docs
             except Exception as e:
                 return f"Error during retrieval: {str(e)}", []
 
@@ -151,6 +153,18 @@ class RAGService:
 
             docs_content = "\n\n".join(doc.content for doc in tool_messages)
 
+            # Several retrieval calls are packed together to share one budget
+            retrieved_docs = [
+                (doc, doc.metadata.get("score", 0.0))
+                for message in tool_messages
+                for doc in (getattr(message, "artifact", None) or [])
+                if isinstance(doc, Document)
+            ]
+            if len(tool_messages) > 1 and retrieved_docs:
+                packed_docs, stats = pack_documents(retrieved_docs)
+                log_packing(stats)
+                docs_content = serialize(packed_docs)
+
             system_message_content = (
                 "You are Bejo, a helpful AI assistant for question-answering tasks. "
                 "You are known for being informative, friendly, and full of energy. "
@@ -0,0 +1,360 @@
+from qdrant_client.models import Batch
+
+from app.core.vectorstore import qdrant_client
+
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Optional
+import gzip
+import json
+import os
+import shutil
+import threading
+import time
+import uuid
+
+import numpy as np
+
+SNAPSHOT_DIR = Path(os.getenv("SNAPSHOT_DIR", "snapshots"))
+SNAPSHOT_DIR.mkdir(exist_ok=True)
+
+SNAPSHOT_SCROLL_BATCH = int(os.getenv("SNAPSHOT_SCROLL_BATCH", 1000))
+SNAPSHOT_UPSERT_BATCH = int(os.getenv("SNAPSHOT_UPSERT_BATCH", 512))
+SNAPSHOT_UPSERT_WORKERS = int(os.getenv("SNAPSHOT_UPSERT_WORKERS", 4))
+
+MANIFEST_FILE = "manifest.json"
+VECTORS_FILE = "vectors.npy"
+SCALES_FILE = "scales.npy"
+PAYLOADS_FILE = "payloads.json.gz"
+
+# Serializes bundle swaps against each other and against imports opening files
+_bundle_locks: dict[str, threading.Lock] = {}
+_bundle_locks_guard = threading.Lock()
+
+
+def _bundle_lock(bundle_name: str) -> threading.Lock:
+    """Get or create the lock for a bundle directory."""
+    with _bundle_locks_guard:
+        if bundle_name not in _bundle_locks:
+            _bundle_locks[bundle_name] = threading.Lock()
+        return _bundle_locks[bundle_name]
+
+
+def _distance(info: Any) -> str:
+    """Get a collection's distance metric as a plain string."""
+    distance = info.config.params.vectors.distance
+    return getattr(distance, "value", distance)
+
+
+def _report(
+    action: str, collection_name: str, done: int, total: int, started: float
+) -> dict[str, Any]:
+    """Print progress and return throughput statistics."""
+    seconds = time.perf_counter() - started
+    rate = done / seconds if seconds > 0 else 0.0
+    print(
+        f"[snapshot] {action} {collection_name}: {done}/{total} points "
+        f"({rate:.0f} points/s)"
+    )
+    return {"points": done, "seconds": round(seconds, 3), "points_per_second": rate}
+
+
+def _flatten_payload(payload: dict[str, Any]) -> dict[tuple[str, ...], Any]:
+    """Flatten one level of nested payload dicts into column paths.
+
+    A nested dict also gets a column of its own holding `{}`, so empty dicts
+    survive the round trip.
+    """
+    flat: dict[tuple[str, ...], Any] = {}
+    for key, value in payload.items():
+        if isinstance(value, dict):
+            flat[(key,)] = {}
+            for sub_key, sub_value in value.items():
+                flat[(key, sub_key)] = sub_value
+        else:
+            flat[(key,)] = value
+    return flat
+
+
+def _to_columns(rows: list[dict[tuple[str, ...], Any]]) -> list[dict[str, Any]]:
+    """Turn flattened rows into columns with the rows they are missing from."""
+    paths = sorted({path for row in rows for path in row})
+    return [
+        {
+            "path": list(path),
+            "values": [row.get(path) for row in rows],
+            "missing": [i for i, row in enumerate(rows) if path not in row],
+        }
+        for path in paths
+    ]
+
+
+def _unflatten_payload(columns: list[dict[str, Any]], index: int) -> dict[str, Any]:
+    """Rebuild the nested payload of one row, keeping stored nulls."""
+    payload: dict[str, Any] = {}
+    # Parent columns sort before their children, so containers exist first
+    for column in columns:
+        if index in column["missing"]:
+            continue
+        value = column["values"][index]
+        if len(column["path"]) == 1:
+            payload[column["path"][0]] = value
+        else:
+            key, sub_key = column["path"]
+            payload.setdefault(key, {})[sub_key] = value
+    return payload
+
+
+def _quantize(vectors: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Symmetric per-vector int8 quantization."""
+    scales = np.abs(vectors).max(axis=1) / 127.0
+    scales[scales == 0] = 1.0
+    quantized = np.round(vectors / scales[:, None]).astype(np.int8)
+    return quantized, scales.astype(np.float32)
+
+
+def export_collection(
+    collection_name: str,
+    quantize: bool = False,
+    progress: Callable[..., dict[str, Any]] = _report,
+) -> dict[str, Any]:
+    """
+    Export a collection to a snapshot bundle without re-embedding.
+
+    The bundle is a directory under SNAPSHOT_DIR holding a manifest, the
+    vectors as a memory-mappable `.npy` array (float32, or int8 with per-vector
+    scales) and the payloads as gzipped JSON columns.
+
+    Args:
+        collection_name: The name of the Qdrant collection to export.
+        quantize: Whether to store vectors as int8 instead of float32.
+        progress: Callback receiving progress after every scrolled batch.
+
+    Returns:
+        A dict with the bundle path, point count and throughput.
+    """
+    info = qdrant_client.get_collection(collection_name)
+    total = qdrant_client.count(collection_name, exact=True).count
+
+    bundle_dir = SNAPSHOT_DIR / collection_name
+    # Build the bundle next to the old one and swap it in when complete, so a
+    # failed export never leaves a mix of old and new files behind
+    staging_dir = SNAPSHOT_DIR / f".{collection_name}.{uuid.uuid4().hex}.tmp"
+    staging_dir.mkdir(parents=True)
+
+    retired_dir = None
+    try:
+        manifest, stats = _write_bundle(
+            staging_dir, collection_name, info, total, quantize, progress
+        )
+
+        with _bundle_lock(collection_name):
+            if bundle_dir.exists():
+                retired_dir = (
+                    SNAPSHOT_DIR / f".{collection_name}.{uuid.uuid4().hex}.old"
+                )
+                os.replace(bundle_dir, retired_dir)
+            try:
+                os.replace(staging_dir, bundle_dir)
+            except BaseException:
+                # Put the previous bundle back rather than leave none at all
+                if retired_dir is not None:
+                    os.replace(retired_dir, bundle_dir)
+                    retired_dir = None
+                raise
+    finally:
+        # After a successful swap the staging directory no longer exists
+        shutil.rmtree(staging_dir, ignore_errors=True)
+        if retired_dir is not None:
+            shutil.rmtree(retired_dir, ignore_errors=True)
+
+    return {
+        "collection": collection_name,
+        "path": str(bundle_dir),
+        "vector_dtype": manifest["dtype"],
+        **stats,
+    }
+
+
+def _write_bundle(
+    bundle_dir: Path,
+    collection_name: str,
+    info: Any,
+    total: int,
+    quantize: bool,
+    progress: Callable[..., dict[str, Any]],
+) -> tuple[dict[str, Any], dict[str, Any]]:
+    """Scroll a collection into a bundle directory and write its manifest last."""
+    dim = info.config.params.vectors.size
+
+    dtype = np.int8 if quantize else np.float32
+    if total:
+        vectors = np.lib.format.open_memmap(
+            bundle_dir / VECTORS_FILE, mode="w+", dtype=dtype, shape=(total, dim)
+        )
+    else:
+        # Zero-length arrays cannot be memory-mapped for writing
+        vectors = np.empty((0, dim), dtype=dtype)
+    scales = np.ones(total, dtype=np.float32)
+    ids: list[Any] = []
+    rows: list[dict[tuple[str, ...], Any]] = []
+
+    started = time.perf_counter()
+    offset = None
+    while len(ids) < total:
+        points, offset = qdrant_client.scroll(
+            collection_name=collection_name,
+            limit=min(SNAPSHOT_SCROLL_BATCH, total - len(ids)),
+            offset=offset,
+            with_payload=True,
+            with_vectors=True,
+        )
+        if not points:
+            break
+
+        start = len(ids)
+        batch = np.asarray([point.vector for point in points], dtype=np.float32)
+        if quantize:
+            batch, batch_scales = _quantize(batch)
+            scales[start : start + len(points)] = batch_scales
+        vectors[start : start + len(points)] = batch
+
+        for point in points:
+            ids.append(point.id)
+            rows.append(_flatten_payload(point.payload or {}))
+
+        progress("export", collection_name, len(ids), total, started)
+        if offset is None:
+            break
+
+    if total:
+        vectors.flush()
+    else:
+        np.save(bundle_dir / VECTORS_FILE, vectors)
+    del vectors
+
+    count = len(ids)
+    with gzip.open(bundle_dir / PAYLOADS_FILE, "wt", encoding="utf-8") as f:
+        json.dump({"id": ids, "columns": _to_columns(rows)}, f)
+
+    if quantize:
+        np.save(bundle_dir / SCALES_FILE, scales[:count])
+
+    manifest = {
+        "collection": collection_name,
+        "count": count,
+        "dim": dim,
+        "dtype": "int8" if quantize else "float32",
+        "distance": _distance(info),
+        "created_at": datetime.now().isoformat(),
+    }
+    with open(bundle_dir / MANIFEST_FILE, "w") as f:
+        json.dump(manifest, f, indent=2)
+
+    stats = progress("export", collection_name, count, total, started)
+    return manifest, stats
+
+
+def import_collection(
+    collection_name: str,
+    bundle_name: Optional[str] = None,
+    progress: Callable[..., dict[str, Any]] = _report,
+) -> dict[str, Any]:
+    """
+    Bulk-upsert a snapshot bundle into a collection without re-embedding.
+
+    Args:
+        collection_name: The name of the Qdrant collection to import into.
+        bundle_name: The bundle directory under SNAPSHOT_DIR. Defaults to
+            `collection_name`.
+        progress: Callback receiving progress after every upserted batch.
+
+    Returns:
+        A dict with the bundle path, point count and throughput.
+
+    Raises:
+        FileNotFoundError: If the bundle does not exist.
+        ValueError: If the bundle name is invalid or its vector size or
+            distance metric does not match the collection.
+    """
+    bundle_name = bundle_name or collection_name
+    bundle_dir = SNAPSHOT_DIR / bundle_name
+    if (
+        bundle_name.startswith(".")
+        or bundle_dir.resolve().parent != SNAPSHOT_DIR.resolve()
+    ):
+        raise ValueError(f"Invalid snapshot name: {bundle_name}")
+
+    info = qdrant_client.get_collection(collection_name)
+    dim = info.config.params.vectors.size
+    distance = _distance(info)
+
+    # Open every file of one bundle version; a later swap does not affect
+    # files that are already mapped or loaded
+    with _bundle_lock(bundle_name):
+        manifest_path = bundle_dir / MANIFEST_FILE
+        if not manifest_path.exists():
+            raise FileNotFoundError(f"Snapshot {bundle_name} does not exist.")
+
+        with open(manifest_path) as f:
+            manifest = json.load(f)
+
+        if manifest["dim"] != dim:
+            raise ValueError(
+                f"Snapshot vector size {manifest['dim']} does not match "
+                f"{collection_name} vector size {dim}"
+            )
+        if manifest["distance"] != distance:
+            raise ValueError(
+                f"Snapshot distance {manifest['distance']} does not match "
+                f"{collection_name} distance {distance}"
+            )
+
+        count = manifest["count"]
+        vectors = np.load(
+            bundle_dir / VECTORS_FILE, mmap_mode="r" if count else None
+        )
+        scales = (
+            np.load(bundle_dir / SCALES_FILE) if manifest["dtype"] == "int8" else None
+        )
+        with gzip.open(bundle_dir / PAYLOADS_FILE, "rt", encoding="utf-8") as f:
+            payloads = json.load(f)
+    ids = payloads["id"]
+    columns = payloads["columns"]
+    for column in columns:
+        column["missing"] = set(column["missing"])
+
+    def upsert(start: int, end: int) -> int:
+        batch = np.asarray(vectors[start:end], dtype=np.float32)
+        if scales is not None:
+            batch *= scales[start:end, None]
+        qdrant_client.upsert(
+            collection_name=collection_name,
+            points=Batch(
+                ids=ids[start:end],
+                vectors=batch.tolist(),
+                payloads=[_unflatten_payload(columns, i) for i in range(start, end)],
+            ),
+            wait=True,
+        )
+        return end - start
+
+    started = time.perf_counter()
+    done = 0
+    stats = progress("import", collection_name, done, count, started)
+    with ThreadPoolExecutor(max_workers=SNAPSHOT_UPSERT_WORKERS) as executor:
+        futures = [
+            executor.submit(upsert, start, min(start + SNAPSHOT_UPSERT_BATCH, count))
+            for start in range(0, count, SNAPSHOT_UPSERT_BATCH)
+        ]
+        for future in as_completed(futures):
+            done += future.result()
+            stats = progress("import", collection_name, done, count, started)
+
+    return {
+        "collection": collection_name,
+        "path": str(bundle_dir),
+        "vector_dtype": manifest["dtype"],
+        **stats,
+    }
@@ -0,0 +1,67 @@
+from langchain_core.documents import Document
+
+from app.core.packer import pack_documents, serialize
+
+
+def chunk(text: str, indices: list[int], document_id: str = "doc-1") -> Document:
+    return Document(
+        page_content=text,
+        metadata={
+            "filename": "handbook.pdf",
+            "document_id": document_id,
+            "chunk_index": indices[0],
+            "chunk_indices": indices,
+        },
+    )
+
+
+def test_overlapping_blocks_are_merged_once():
+    packed, _ = pack_documents(
+        [
+            (chunk("Chunk zero.\n\nChunk one.", [0, 1]), 0.8),
+            (chunk("Chunk one.\n\nChunk two.", [1, 2]), 0.7),
+        ]
+    )
+
+    assert len(packed) == 1
+    assert packed[0].metadata["chunk_indices"] == [0, 1, 2]
+    assert serialize(packed).count("Chunk one.") == 1
+    assert packed[0].page_content == "Chunk zero.\n\nChunk one.\n\nChunk two."
+
+
+def test_chunk_covered_by_block_is_not_repeated():
+    packed, _ = pack_documents(
+        [
+            (chunk("Chunk one.", [1]), 0.9),
+            (chunk("Chunk one.\n\nChunk two.", [1, 2]), 0.7),
+        ]
+    )
+
+    assert len(packed) == 1
+    assert packed[0].metadata["chunk_indices"] == [1, 2]
+    assert serialize(packed).count("Chunk one.") == 1
+
+
+def test_adjacent_chunks_are_merged_and_distant_ones_kept_apart():
+    packed, _ = pack_documents(
+        [
+            (chunk("Chunk zero.", [0]), 0.9),
+            (chunk("Chunk one.", [1]), 0.8),
+            (chunk("Chunk five.", [5]), 0.7),
+        ]
+    )
+
+    assert [doc.metadata["chunk_indices"] for doc in packed] == [[0, 1], [5]]
+
+
+def test_packed_context_fits_token_budget():
+    docs = [
+        (chunk(f"word{i} " * 400, [i], document_id=f"doc-{i}"), 1 - i / 10)
+        for i in range(5)
+    ]
+
+    packed, stats = pack_documents(docs, token_budget=300)
+
+    assert stats["tokens_after"] <= 300
+    assert stats["tokens_before"] > stats["tokens_after"]
+    assert packed[0].metadata["document_id"] == "doc-0"